@@ -1,10 +1,13 @@
 """Smart Traffic Management System — FastAPI Backend."""
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from routers.detection import router as detection_router
 from routers.simulation import router as simulation_router
+from services.detector import detector
 
 app = FastAPI(
     title="Smart Traffic Management System",
@@ -25,6 +28,12 @@ app.include_router(detection_router, prefix="/api")
 app.include_router(simulation_router, prefix="/api")
 
 
+@app.on_event("startup")
+async def load_detector():
+    """Load and warm up the YOLO model once, before the first request arrives."""
+    await asyncio.to_thread(detector.load)
+
+
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Smart Traffic Management API"}
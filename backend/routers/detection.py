@@ -3,33 +3,98 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
-import time
 import traceback
 from typing import Any, Dict
-from concurrent.futures import ThreadPoolExecutor
 
-import cv2
-import numpy as np
+import orjson
+import pybase64
 from fastapi import APIRouter, File, UploadFile, WebSocket, WebSocketDisconnect
 from starlette.websockets import WebSocketState
 
-from services.detector import detector
+from services.detector import StreamState, scheduler
 from services.signal_logic import determine_signal
 
 router = APIRouter(tags=["detection"])
 
-# Thread pool for CPU-bound YOLO inference so it doesn't block the event loop
-_executor = ThreadPoolExecutor(max_workers=2)
 
+async def _send(websocket: WebSocket, payload: Dict[str, Any], text: bool = False):
+    """Send *payload* as compact orjson-encoded JSON, in a text or binary frame."""
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    if text:
+        await websocket.send_text(body.decode())
+    else:
+        await websocket.send_bytes(body)
 
-def _run_detection(image_bytes: bytes):
-    """Synchronous detection — runs in thread pool."""
-    start = time.time()
-    detections = detector.detect_from_bytes(image_bytes)
-    inference_ms = round((time.time() - start) * 1000, 1)
-    return detections, inference_ms
+
+class _LatestFrame:
+    """Single-slot mailbox: a newer frame overwrites one not yet picked up."""
+
+    def __init__(self):
+        self._frame: bytes | str | None = None
+        self._error: BaseException | None = None
+        self._ready = asyncio.Event()
+        self.text = False  # client sends text frames — reply in text frames too
+
+    def put(self, frame: bytes | str):
+        self._frame = frame
+        self._ready.set()
+
+    def close(self, error: BaseException):
+        """Wake the consumer with *error* (e.g. the client disconnected)."""
+        self._error = error
+        self._ready.set()
+
+    async def get(self) -> bytes | str:
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        return frame
+
+
+async def _receive_frames(websocket: WebSocket, frames: _LatestFrame):
+    """Drain the socket greedily, keeping only the most recent frame."""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text")
+            if data:
+                frames.text = isinstance(data, str)
+                frames.put(data)
+    except Exception as e:
+        frames.close(e)
+
+
+# Longest data URL header searched for the base64 separator
+_DATA_URL_HEADER_MAX = 128
+
+
+def _decode_text_frame(data: str) -> bytes:
+    """Decode a legacy text frame (JSON-wrapped or bare base64 data URL)."""
+    try:
+        payload = json.loads(data)
+        frame_b64 = payload.get("frame", "")
+    except json.JSONDecodeError:
+        frame_b64 = data
+
+    if not frame_b64:
+        return b""
+
+    # Strip data URL prefix ("data:image/jpeg;base64,") — base64 never
+    # contains a comma, so only the head of the string needs scanning
+    comma = frame_b64.find(",", 0, _DATA_URL_HEADER_MAX)
+    if comma >= 0:
+        frame_b64 = frame_b64[comma + 1:]
+
+    # SIMD-accelerated; same lenient semantics as base64.b64decode
+    return pybase64.b64decode(frame_b64, validate=False)
 
 
 @router.post("/detect")
@@ -38,8 +103,7 @@ async def detect_image(file: UploadFile = File(...)) -> Dict[str, Any]:
     Upload an image and get vehicle detections + signal state.
     """
     contents = await file.read()
-    loop = asyncio.get_event_loop()
-    detections, inference_ms = await loop.run_in_executor(_executor, _run_detection, contents)
+    detections, inference_ms = await scheduler.submit(contents)
     signal = determine_signal(detections)
 
     class_counts: Dict[str, int] = {}
@@ -63,53 +127,54 @@ async def websocket_detect(websocket: WebSocket):
     """
     WebSocket endpoint for real-time video detection.
 
-    Flow control: waits for inference to finish before accepting the next frame,
-    preventing queue buildup and timeouts.
+    Clients send each frame as a binary message containing the raw JPEG
+    bytes (e.g. ``ws.send(blob)`` from ``canvas.toBlob``). Text frames —
+    JSON ``{"frame": <data URL>}`` or a bare base64 string — are still
+    accepted for legacy clients. Replies use the same frame type the client
+    sends.
+
+    Flow control: a receiver task drains the socket continuously into a
+    single "latest-wins" slot while this coroutine runs inference on
+    whatever frame is newest. Frames that arrive during inference replace
+    each other, so memory stays bounded and latency never exceeds roughly
+    one inference, however fast the client streams.
     """
     await websocket.accept()
     print("[WS] Client connected")
 
-    try:
-        loop = asyncio.get_event_loop()
+    frames = _LatestFrame()
+    stream = StreamState()  # lets the scheduler skip inference on unchanged frames
+    receiver = asyncio.create_task(_receive_frames(websocket, frames))
 
+    try:
         while True:
             # Wait for a frame from the client (with a generous timeout)
             try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+                data = await asyncio.wait_for(frames.get(), timeout=30.0)
             except asyncio.TimeoutError:
                 # Send a keepalive ping if no frame received in 30s
                 if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json({"type": "ping"})
-                continue
-
-            # Parse the frame
-            try:
-                payload = json.loads(data)
-                frame_b64 = payload.get("frame", "")
-            except json.JSONDecodeError:
-                frame_b64 = data
-
-            if not frame_b64:
+                    await _send(websocket, {"type": "ping"}, frames.text)
                 continue
 
-            # Strip data URL prefix
-            if "," in frame_b64:
-                frame_b64 = frame_b64.split(",", 1)[1]
+            if isinstance(data, str):
+                try:
+                    image_bytes = _decode_text_frame(data)
+                except Exception:
+                    await _send(websocket, {"error": "Invalid base64 frame"}, frames.text)
+                    continue
+            else:
+                image_bytes = data
 
-            try:
-                image_bytes = base64.b64decode(frame_b64)
-            except Exception:
-                await websocket.send_json({"error": "Invalid base64 frame"})
+            if not image_bytes:
                 continue
 
-            # Run detection in thread pool (non-blocking)
+            # Batched detection — coalesced with frames from other clients
             try:
-                detections, inference_ms = await loop.run_in_executor(
-                    _executor, _run_detection, image_bytes
-                )
+                detections, inference_ms = await scheduler.submit(image_bytes, stream)
             except Exception as e:
                 print(f"[WS] Inference error: {e}")
-                await websocket.send_json({"error": f"Inference failed: {e}"})
+                await _send(websocket, {"error": f"Inference failed: {e}"}, frames.text)
                 continue
 
             signal = determine_signal(detections)
@@ -119,7 +184,7 @@ async def websocket_detect(websocket: WebSocket):
                 name = det["class_name"]
                 class_counts[name] = class_counts.get(name, 0) + 1
 
-            await websocket.send_json({
+            await _send(websocket, {
                 "type": "detection",
                 "detections": detections,
                 "signal": signal,
@@ -128,7 +193,7 @@ async def websocket_detect(websocket: WebSocket):
                     "class_counts": class_counts,
                     "inference_ms": inference_ms,
                 },
-            })
+            }, frames.text)
 
     except WebSocketDisconnect:
         print("[WS] Client disconnected")
@@ -137,6 +202,8 @@ async def websocket_detect(websocket: WebSocket):
         traceback.print_exc()
         try:
             if websocket.client_state == WebSocketState.CONNECTED:
-                await websocket.send_json({"error": str(e)})
+                await _send(websocket, {"error": str(e)}, frames.text)
         except Exception:
             pass
+    finally:
+        receiver.cancel()
@@ -2,18 +2,22 @@
 
 from __future__ import annotations
 
+import hashlib
 import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 
 # Add project root so we can import dijkstra module
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(_PROJECT_ROOT))
 
-from dijkstra import build_adjacency, dijkstra  # noqa: E402
+from dijkstra import Graph, astar, build_adjacency, dijkstra  # noqa: E402
 from services.simulator import (
     generate_signal_phases,
     get_intersection_types,
@@ -25,7 +29,9 @@ router = APIRouter(tags=["simulation"])
 
 # ---------- Request / Response models ----------
 
-class VehicleCount(BaseModel):
+class VehicleCount(TypedDict):
+    # TypedDict rather than BaseModel: Pydantic still validates each entry
+    # but yields plain dicts, which generate_signal_phases consumes directly
     type: str
     count: int
 
@@ -52,20 +58,69 @@ class RouteRequest(BaseModel):
     start: str
     destination: str
     use_traffic: bool = True
+    node_coords: Optional[Dict[str, Tuple[float, float]]] = None  # node → (x, y), enables A*
+
+
+# ---------- Graph cache ----------
+
+# Road networks are mostly static, so repeated routing queries reuse the
+# built graph (adjacency + CSR) instead of rebuilding it per request.
+_GRAPH_CACHE_SIZE = 32
+_graph_cache: OrderedDict[Tuple[bool, bytes], Graph] = OrderedDict()
+
+
+def _get_graph(edges: List[Dict[str, Any]], use_traffic: bool) -> Graph:
+    """Return the graph for *edges*, reusing a cached build of an identical edge list."""
+    # Hash the edge list as serialized JSON — far cheaper than building a
+    # per-edge key, and still independent of start/destination
+    key = (use_traffic, hashlib.sha1(orjson.dumps(edges)).digest())
+
+    graph = _graph_cache.get(key)
+    if graph is not None:
+        _graph_cache.move_to_end(key)
+        return graph
+
+    graph = build_adjacency(edges, use_traffic=use_traffic)
+    _graph_cache[key] = graph
+    if len(_graph_cache) > _GRAPH_CACHE_SIZE:
+        _graph_cache.popitem(last=False)
+    return graph
+
+
+# ---------- Static responses ----------
+
+def _static_json(payload: Any) -> Tuple[bytes, str]:
+    """Serialize *payload* once; returns ``(body, etag)``."""
+    body = orjson.dumps(payload)
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _cached_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-encoded JSON with caching headers, or 304 if the client's copy is current."""
+    headers = {"Cache-Control": "public, max-age=3600", "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Intersection and vehicle types never change at runtime
+_INTERSECTION_JSON, _INTERSECTION_ETAG = _static_json({"types": get_intersection_types()})
+_VEHICLE_JSON, _VEHICLE_ETAG = _static_json({"types": get_vehicle_types()})
 
 
 # ---------- Endpoints ----------
 
 @router.get("/intersection-types")
-async def list_intersection_types():
+async def list_intersection_types(request: Request) -> Response:
     """Return all available intersection configurations."""
-    return {"types": get_intersection_types()}
+    return _cached_response(request, _INTERSECTION_JSON, _INTERSECTION_ETAG)
 
 
 @router.get("/vehicle-types")
-async def list_vehicle_types():
+async def list_vehicle_types(request: Request) -> Response:
     """Return all vehicle types with properties."""
-    return {"types": get_vehicle_types()}
+    return _cached_response(request, _VEHICLE_JSON, _VEHICLE_ETAG)
 
 
 @router.post("/simulate")
@@ -73,13 +128,9 @@ async def simulate(req: SimulationRequest) -> Dict[str, Any]:
     """
     Run a traffic signal simulation for the given intersection type and vehicle distribution.
     """
-    vehicles = {
-        road: [v.model_dump() for v in vlist]
-        for road, vlist in req.vehicles_per_road.items()
-    }
     result = generate_signal_phases(
         intersection_type=req.intersection_type,
-        vehicles_per_road=vehicles,
+        vehicles_per_road=req.vehicles_per_road,
         emergency_roads=req.emergency_roads,
     )
     return result
@@ -88,10 +139,16 @@ async def simulate(req: SimulationRequest) -> Dict[str, Any]:
 @router.post("/route")
 async def compute_route(req: RouteRequest) -> Dict[str, Any]:
     """
-    Compute the shortest emergency route using Dijkstra's algorithm.
+    Compute the shortest emergency route.
+
+    Uses Dijkstra, or A* with a straight-line heuristic when ``node_coords``
+    cover every node.
     """
-    adjacency = build_adjacency(req.edges, use_traffic=req.use_traffic)
-    path, cost = dijkstra(adjacency, req.start, req.destination)
+    graph = _get_graph(req.edges, req.use_traffic)
+    if req.node_coords:
+        path, cost = astar(graph, req.start, req.destination, req.node_coords)
+    else:
+        path, cost = dijkstra(graph, req.start, req.destination)
 
     if cost == -1:
         return {"path": [], "cost": -1, "reachable": False}
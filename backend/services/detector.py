@@ -2,14 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Tuple
 
 import cv2
 import numpy as np
+import torch
+import torch.nn.functional as F
 from ultralytics import YOLO
 
+try:
+    from torchvision.io import ImageReadMode, decode_jpeg
+except ImportError:  # very old torchvision — JPEGs are decoded on the CPU
+    decode_jpeg = None
+
 # Resolve model path relative to project root
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 _MODEL_PATH = _PROJECT_ROOT / "model" / "best"
@@ -23,22 +33,98 @@ CLASS_NAMES = [
 # Emergency vehicle class names (trigger signal override)
 EMERGENCY_CLASSES = {"Ambulance", "Fire Engine"}
 
+# Same set as integer class IDs, for vectorised checks on model output
+EMERGENCY_IDS = frozenset(i for i, name in enumerate(CLASS_NAMES) if name in EMERGENCY_CLASSES)
+_EMERGENCY_ID_ARRAY = np.array(sorted(EMERGENCY_IDS), dtype=np.int32)
+
+# Inference settings — FP16 on the first GPU when one is available. The
+# input size comes from the loaded model (see VehicleDetector.load)
+_USE_CUDA = torch.cuda.is_available()
+_PREDICT_KWARGS: Dict[str, Any] = {"device": 0, "half": True} if _USE_CUDA else {"device": "cpu"}
+
+# Experimental, opt-in (DETECTOR_GPU_DECODE=1): decode JPEGs straight into
+# GPU memory with nvJPEG, on a side CUDA stream. Not yet measured on a CUDA
+# host — model.predict() copies tensor input back to the host for
+# post-processing, which may cost more than the upload it saves
+_GPU_DECODE = (
+    os.environ.get("DETECTOR_GPU_DECODE") == "1" and _USE_CUDA and decode_jpeg is not None
+)
+_DECODE_STREAM = torch.cuda.Stream() if _GPU_DECODE else None
+
+# Decoding parallelises across threads; inference runs on one dedicated
+# worker so predict() calls never race on the shared YOLO model or
+# duplicate CUDA buffers
+_pre_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="detector-decode")
+_infer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detector-infer")
+
+# CPU hosts: leave half the cores to the event loop, decoding and the OS
+if not _USE_CUDA:
+    torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+
+class _GpuFrame(NamedTuple):
+    """A frame decoded and letterboxed on the GPU, plus what's needed to undo the letterbox."""
+
+    tensor: torch.Tensor    # 3 x imgsz x imgsz, RGB, float in [0, 1]
+    scale: float            # resize factor applied to the original image
+    pad: Tuple[int, int]    # (left, top) padding in pixels
+    shape: Tuple[int, int]  # original (height, width)
+
+
+class DecodeScratch:
+    """Reusable per-stream decode buffers (one frame in flight per stream)."""
+
+    def __init__(self):
+        self._pinned: torch.Tensor | None = None
+        self._gray: np.ndarray | None = None
+
+    def staging(self, image_bytes: bytes) -> torch.Tensor:
+        """Copy *image_bytes* into a pinned host buffer (grown as needed) for a fast H2D upload."""
+        n = len(image_bytes)
+        if self._pinned is None or self._pinned.numel() < n:
+            self._pinned = torch.empty(1 << (n - 1).bit_length(), dtype=torch.uint8, pin_memory=True)
+        staged = self._pinned[:n]
+        staged.numpy()[:] = np.frombuffer(image_bytes, np.uint8)
+        return staged
+
+    def gray(self, shape: Tuple[int, int]) -> np.ndarray:
+        """A reusable single-channel buffer of *shape* (e.g. ``cv2.cvtColor`` ``dst``)."""
+        if self._gray is None or self._gray.shape != shape:
+            self._gray = np.empty(shape, np.uint8)
+        return self._gray
+
 
 class VehicleDetector:
     """Wraps the YOLO model for inference on images and video frames."""
 
     def __init__(self):
         self._model: YOLO | None = None
+        self._imgsz: int | None = None
+        self._predict_kwargs: Dict[str, Any] = _PREDICT_KWARGS
 
-    def _load_model(self) -> YOLO:
-        """Lazy-load the YOLO model."""
+    def load(self) -> YOLO:
+        """Load and warm up the YOLO model (idempotent). Called once at app startup."""
         if self._model is None:
             model_path = None
 
+            # 0) Prefer a TensorRT FP16 engine on GPU hosts (scripts/export_engine.py)
+            engine = _MODEL_PATH.parent / "best.engine"
+            if _USE_CUDA and engine.exists():
+                model_path = engine
+
+            # 0b) CPU hosts: prefer int8 OpenVINO, then ONNX (scripts/export_quantized.py)
+            if not _USE_CUDA:
+                for name in ("best_int8_openvino_model", "best_openvino_model", "best.onnx"):
+                    candidate = _MODEL_PATH.parent / name
+                    if candidate.exists():
+                        model_path = candidate
+                        break
+
             # 1) Check for best.pt next to the best/ directory (most common)
-            pt_sibling = _MODEL_PATH.parent / "best.pt"
-            if pt_sibling.exists():
-                model_path = pt_sibling
+            if model_path is None:
+                pt_sibling = _MODEL_PATH.parent / "best.pt"
+                if pt_sibling.exists():
+                    model_path = pt_sibling
 
             # 2) Check for .pt files inside model/best/
             if model_path is None:
@@ -59,46 +145,387 @@ class VehicleDetector:
                 model_path = _MODEL_PATH
 
             print(f"[Detector] Loading YOLO model from: {model_path}")
-            self._model = YOLO(str(model_path))
-            print(f"[Detector] Model loaded successfully")
+            model = YOLO(str(model_path), task="detect")
+            if model_path.suffix == ".pt":
+                if _USE_CUDA:
+                    model.to("cuda")
+                model.fuse()
+
+            # Run at the size the model was trained (or exported) at
+            imgsz = _model_imgsz(model)
+            self._predict_kwargs = {**_PREDICT_KWARGS, "imgsz": imgsz}
+
+            # Warm-up pass so CUDA kernels / buffers are set up before traffic
+            dummy = np.zeros((imgsz, imgsz, 3), np.uint8)
+            model.predict(dummy, verbose=False, **self._predict_kwargs)
+
+            self._imgsz = imgsz
+            self._model = model
+            backend = "cuda fp16" if _USE_CUDA else "cpu"
+            print(f"[Detector] Model loaded successfully ({backend}, imgsz={imgsz})")
         return self._model
 
     @property
     def model(self) -> YOLO:
-        return self._load_model()
+        if self._model is None:
+            raise RuntimeError("YOLO model not loaded — call detector.load() at startup")
+        return self._model
 
-    def detect_from_bytes(self, image_bytes: bytes, conf: float = 0.35) -> List[Dict[str, Any]]:
-        """Run detection on raw image bytes. Returns list of detection dicts."""
+    @property
+    def imgsz(self) -> int:
+        """Square input size the loaded model runs at."""
+        if self._imgsz is None:
+            raise RuntimeError("YOLO model not loaded — call detector.load() at startup")
+        return self._imgsz
+
+    def decode(
+        self,
+        image_bytes: bytes,
+        scratch: DecodeScratch | None = None,
+    ) -> np.ndarray | _GpuFrame | None:
+        """
+        Decode raw image bytes for inference (``None`` if undecodable).
+
+        With ``DETECTOR_GPU_DECODE=1`` on a CUDA host, JPEGs are decoded and
+        letterboxed on the GPU; otherwise this returns a BGR frame via OpenCV.
+        Pass a per-stream *scratch* to stage uploads in reusable pinned memory.
+        """
+        if _GPU_DECODE and image_bytes[:2] == b"\xff\xd8":
+            frame = self._decode_gpu(image_bytes, scratch)
+            if frame is not None:
+                return frame
         nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None:
-            return []
-        return self._run_inference(frame, conf)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+    def _decode_gpu(self, image_bytes: bytes, scratch: DecodeScratch | None) -> _GpuFrame | None:
+        """Decode a JPEG with nvJPEG and letterbox it to :attr:`imgsz`, never leaving the GPU."""
+        with torch.cuda.stream(_DECODE_STREAM):
+            try:
+                if scratch is not None:
+                    data = scratch.staging(image_bytes)
+                else:
+                    data = torch.frombuffer(bytearray(image_bytes), dtype=torch.uint8)
+                img = decode_jpeg(data, mode=ImageReadMode.RGB, device="cuda")
+            except (RuntimeError, TypeError):
+                return None
+
+            size = self.imgsz
+            h, w = img.shape[1:]
+            scale = min(size / h, size / w)
+            nh, nw = round(h * scale), round(w * scale)
+            left, top = (size - nw) // 2, (size - nh) // 2
+
+            x = F.interpolate(img[None].float(), size=(nh, nw), mode="bilinear", align_corners=False)
+            x = F.pad(x, (left, size - nw - left, top, size - nh - top), value=114.0)
+            tensor = x[0].div_(255.0)
+            ready = torch.cuda.Event()
+            ready.record()
+
+        # Block this (decode) thread, not the GPU, until the frame is ready
+        # for use on the inference stream
+        ready.synchronize()
+        return _GpuFrame(tensor, scale, (left, top), (h, w))
+
+    def detect_from_bytes(
+        self,
+        image_bytes: bytes,
+        conf: float = 0.35,
+        scratch: DecodeScratch | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Run detection on raw image bytes. Returns list of detection dicts."""
+        return self.detect_batch([self.decode(image_bytes, scratch)], conf)[0]
 
     def detect_from_frame(self, frame: np.ndarray, conf: float = 0.35) -> List[Dict[str, Any]]:
         """Run detection on a numpy BGR frame."""
         return self._run_inference(frame, conf)
 
+    def detect_batch(
+        self,
+        frames: List[np.ndarray | _GpuFrame | None],
+        conf: float = 0.35,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run batched inference over frames returned by :meth:`decode`.
+
+        Returns one detection list per input frame; ``None`` frames (failed
+        decodes) yield an empty list without being sent to the model.
+        """
+        return self.extract_batch(frames, self.predict_batch(frames, conf))
+
+    def predict_batch(
+        self,
+        frames: List[np.ndarray | _GpuFrame | None],
+        conf: float = 0.35,
+    ) -> List[Any]:
+        """
+        Forward pass only: returns raw Ultralytics ``Results`` aligned with
+        *frames* (``None`` where the frame was ``None``).
+
+        GPU-decoded frames are stacked into one tensor batch and CPU frames
+        go through as a list (normally only one kind is present).
+        """
+        results: List[Any] = [None] * len(frames)
+        on_gpu = [i for i, frame in enumerate(frames) if isinstance(frame, _GpuFrame)]
+        on_cpu = [i for i, frame in enumerate(frames) if isinstance(frame, np.ndarray)]
+
+        if on_gpu:
+            batch = torch.stack([frames[i].tensor for i in on_gpu])
+            gpu_results = self.model.predict(batch, conf=conf, verbose=False, **self._predict_kwargs)
+            for i, result in zip(on_gpu, gpu_results):
+                results[i] = result
+
+        if on_cpu:
+            cpu_results = self.model.predict(
+                [frames[i] for i in on_cpu], conf=conf, verbose=False, **self._predict_kwargs
+            )
+            for i, result in zip(on_cpu, cpu_results):
+                results[i] = result
+
+        return results
+
+    def extract_batch(
+        self,
+        frames: List[np.ndarray | _GpuFrame | None],
+        results: List[Any],
+    ) -> List[List[Dict[str, Any]]]:
+        """Post-process :meth:`predict_batch` output into detection lists."""
+        return [
+            [] if result is None
+            else self._extract(result, frame if isinstance(frame, _GpuFrame) else None)
+            for frame, result in zip(frames, results)
+        ]
+
     def _run_inference(self, frame: np.ndarray, conf: float) -> List[Dict[str, Any]]:
-        results = self.model.predict(frame, conf=conf, verbose=False)
+        results = self.model.predict(frame, conf=conf, verbose=False, **self._predict_kwargs)
         detections: List[Dict[str, Any]] = []
         for result in results:
-            boxes = result.boxes
-            if boxes is None:
-                continue
-            for i in range(len(boxes)):
-                cls_id = int(boxes.cls[i].item())
-                cls_name = CLASS_NAMES[cls_id] if cls_id < len(CLASS_NAMES) else f"class_{cls_id}"
-                det = {
-                    "class_id": cls_id,
-                    "class_name": cls_name,
-                    "confidence": round(float(boxes.conf[i].item()), 3),
-                    "bbox": [round(float(c), 1) for c in boxes.xyxy[i].tolist()],
-                    "is_emergency": cls_name in EMERGENCY_CLASSES,
-                }
-                detections.append(det)
+            detections.extend(self._extract(result))
         return detections
 
+    def _extract(self, result, letterbox: _GpuFrame | None = None) -> List[Dict[str, Any]]:
+        """
+        Convert one Ultralytics ``Results`` object into detection dicts.
+
+        For GPU-letterboxed input, pass the frame as *letterbox* so boxes are
+        mapped back to original image coordinates.
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        # One device→host copy per field, rounded in bulk, instead of
+        # several .item() syncs per box
+        xyxy = boxes.xyxy.cpu().numpy().astype(np.float64)
+        if letterbox is not None:
+            (left, top), (h, w) = letterbox.pad, letterbox.shape
+            xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - left) / letterbox.scale).clip(0, w)
+            xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - top) / letterbox.scale).clip(0, h)
+        xyxy = xyxy.round(1)
+        confs = boxes.conf.cpu().numpy().astype(np.float64).round(3)
+        cls_ids = boxes.cls.cpu().numpy().astype(np.int32)
+        emergency_mask = np.isin(cls_ids, _EMERGENCY_ID_ARRAY)
+
+        return [
+            {
+                "class_id": cls_id,
+                "class_name": CLASS_NAMES[cls_id] if cls_id < len(CLASS_NAMES) else f"class_{cls_id}",
+                "confidence": conf,
+                "bbox": bbox,
+                "is_emergency": is_emergency,
+            }
+            for cls_id, conf, bbox, is_emergency in zip(
+                cls_ids.tolist(), confs.tolist(), xyxy.tolist(), emergency_mask.tolist()
+            )
+        ]
+
+
+def _model_imgsz(model: YOLO) -> int:
+    """Input size *model* was trained at (``.pt``) or exported at (engine / OpenVINO / ONNX)."""
+    imgsz = model.overrides.get("imgsz")
+    if imgsz is None:
+        # Exported models keep it in their metadata, which Ultralytics only
+        # reads once the predictor is set up
+        model.predict(np.zeros((32, 32, 3), np.uint8), verbose=False, **_PREDICT_KWARGS)
+        imgsz = model.predictor.model.imgsz
+    return imgsz if isinstance(imgsz, int) else max(imgsz)
+
+
+def _frame_hash(frame: np.ndarray | _GpuFrame, scratch: DecodeScratch) -> int:
+    """64-bit average hash: an 8x8 grayscale thumbnail thresholded at its mean."""
+    if isinstance(frame, _GpuFrame):
+        # Hash only the image area, not the letterbox padding
+        (left, top), (h, w) = frame.pad, frame.shape
+        nh, nw = round(h * frame.scale), round(w * frame.scale)
+        with torch.cuda.stream(_DECODE_STREAM):  # .cpu() then waits on decoding only
+            gray = frame.tensor[:, top:top + nh, left:left + nw].mean(0, keepdim=True)[None]
+            thumb = F.adaptive_avg_pool2d(gray, 8)[0, 0].cpu().numpy()
+    else:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=scratch.gray(frame.shape[:2]))
+        thumb = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(thumb > thumb.mean()).tobytes(), "big")
+
+
+class StreamState:
+    """
+    Per-stream (e.g. per-WebSocket) cache of the last inferred frame's hash and
+    detections, reused for near-identical frames until ``max_age`` seconds old.
+    """
+
+    def __init__(self, threshold: int = 5, max_age: float = 1.0):
+        self.threshold = threshold
+        self.max_age = max_age
+        self._hash: int | None = None
+        self._detections: List[Dict[str, Any]] | None = None
+        self._inferred_at = 0.0
+        self.scratch = DecodeScratch()
+
+    def lookup(self, frame_hash: int) -> List[Dict[str, Any]] | None:
+        """Cached detections if *frame_hash* is close enough to the last inferred frame."""
+        if self._hash is None or time.monotonic() - self._inferred_at >= self.max_age:
+            return None
+        # Popcount of the XOR = Hamming distance (bin().count keeps Python 3.9 support)
+        if bin(frame_hash ^ self._hash).count("1") < self.threshold:
+            return self._detections
+        return None
+
+    def update(self, frame_hash: int, detections: List[Dict[str, Any]]):
+        self._hash = frame_hash
+        self._detections = detections
+        self._inferred_at = time.monotonic()
+
+
+class BatchScheduler:
+    """
+    Batched detection shared by all requests, pipelined as decode → infer →
+    post-process with at most ``2 * max_batch`` frames in flight.
+    """
+
+    def __init__(
+        self,
+        detector: VehicleDetector,
+        max_batch: int = 8,
+        max_wait: float = 0.008,
+        conf: float = 0.35,
+    ):
+        self._detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.conf = conf
+        self._decoded: asyncio.Queue | None = None
+        self._results: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        if self._tasks and not any(task.done() for task in self._tasks):
+            return
+        for task in self._tasks:
+            task.cancel()
+        self._decoded = asyncio.Queue()
+        self._results = asyncio.Queue()
+        self._slots = asyncio.Semaphore(2 * self.max_batch)
+        self._tasks = [
+            asyncio.create_task(self._infer_loop()),
+            asyncio.create_task(self._postprocess_loop()),
+        ]
+
+    async def submit(
+        self,
+        image_bytes: bytes,
+        stream: StreamState | None = None,
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """Queue a frame for batched inference. Returns ``(detections, inference_ms)``."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        start = time.time()
+
+        async with self._slots:
+            # Stage 1: decode (+ hash) off the event loop
+            frame, frame_hash = await loop.run_in_executor(
+                _pre_executor, self._prepare, image_bytes, stream
+            )
+            if frame is None:
+                return [], round((time.time() - start) * 1000, 1)
+            if frame_hash is not None:
+                cached = stream.lookup(frame_hash)
+                if cached is not None:
+                    return cached, round((time.time() - start) * 1000, 1)
+
+            future = loop.create_future()
+            self._decoded.put_nowait((frame, frame_hash, stream, future, start))
+            return await future
+
+    def _prepare(
+        self,
+        image_bytes: bytes,
+        stream: StreamState | None,
+    ) -> Tuple[np.ndarray | _GpuFrame | None, int | None]:
+        """Decode a frame and, for streams, compute its hash (runs on the decode pool)."""
+        if stream is None:
+            return self._detector.decode(image_bytes), None
+        frame = self._detector.decode(image_bytes, stream.scratch)
+        if frame is None:
+            return None, None
+        return frame, _frame_hash(frame, stream.scratch)
+
+    async def _infer_loop(self):
+        """Stage 2: gather a micro-batch of decoded frames and run one forward pass."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._decoded.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._decoded.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await loop.run_in_executor(
+                    _infer_executor,
+                    self._detector.predict_batch,
+                    [frame for frame, *_ in batch],
+                    self.conf,
+                )
+            except Exception as e:
+                _fail(batch, e)
+                continue
+            self._results.put_nowait((batch, results))
+
+    async def _postprocess_loop(self):
+        """Stage 3: turn raw results into detections and resolve the callers."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, results = await self._results.get()
+            try:
+                detections = await loop.run_in_executor(
+                    _pre_executor,
+                    self._detector.extract_batch,
+                    [frame for frame, *_ in batch],
+                    results,
+                )
+            except Exception as e:
+                _fail(batch, e)
+                continue
+
+            now = time.time()
+            for (_, frame_hash, stream, future, start), dets in zip(batch, detections):
+                if frame_hash is not None:
+                    stream.update(frame_hash, dets)
+                if not future.done():
+                    future.set_result((dets, round((now - start) * 1000, 1)))
+
+
+def _fail(batch: List[Tuple[Any, ...]], error: Exception):
+    """Propagate *error* to every caller still waiting on *batch*."""
+    for *_, future, _ in batch:
+        if not future.done():
+            future.set_exception(error)
+
 
-# Singleton instance
+# Singleton instances
 detector = VehicleDetector()
+scheduler = BatchScheduler(detector)
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import List, Dict, Any
 
-from services.detector import EMERGENCY_CLASSES
+from services.detector import EMERGENCY_IDS
 
 
 class SignalState:
@@ -26,7 +26,8 @@ def determine_signal(detections: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     emergency_found = []
     for det in detections:
-        if det.get("class_name") in EMERGENCY_CLASSES and det.get("confidence", 0) >= 0.3:
+        # Integer class-ID check (precomputed set) rather than a class-name lookup
+        if det["class_id"] in EMERGENCY_IDS and det["confidence"] >= 0.3:
             emergency_found.append(det["class_name"])
 
     if emergency_found:
@@ -1,28 +1,33 @@
-"""Multi-way intersection traffic simulation engine."""
+"""
+Multi-way intersection traffic simulation engine.
+
+Fully annotated so it can be compiled with mypyc (see cmd.md); the compiled
+extension is a drop-in replacement for this module.
+"""
 
 from __future__ import annotations
 
 import math
 import random
-from typing import Dict, List, Any
+from typing import Dict, Final, List, Any, Tuple
 
 
 # Default phase durations in seconds
-DEFAULT_GREEN = 30
-DEFAULT_YELLOW = 5
-DEFAULT_RED = 30
+DEFAULT_GREEN: Final = 30
+DEFAULT_YELLOW: Final = 5
+DEFAULT_RED: Final = 30
 
 # Emergency green durations by priority tier
-AMBULANCE_GREEN = 60     # Ambulance — highest urgency, longest green
-FIRE_ENGINE_GREEN = 45   # Fire Engine — high urgency, extended green
+AMBULANCE_GREEN: Final = 60     # Ambulance — highest urgency, longest green
+FIRE_ENGINE_GREEN: Final = 45   # Fire Engine — high urgency, extended green
 
 # Emergency vehicle priority levels (higher = more urgent)
-EMERGENCY_PRIORITY = {
+EMERGENCY_PRIORITY: Final[Dict[str, int]] = {
     "Ambulance": 5,       # Life-threatening, highest priority
     "Fire Engine": 3,     # Urgent but lower than ambulance
 }
 
-VEHICLE_TYPES = [
+VEHICLE_TYPES: Final[List[Dict[str, Any]]] = [
     {"id": "Ambulance", "label": "Ambulance", "priority": 5, "color": "#ef4444", "emergency": True},
     {"id": "Fire Engine", "label": "Fire Engine", "priority": 3, "color": "#dc2626", "emergency": True},
     {"id": "car", "label": "Car", "priority": 0, "color": "#4a8af4", "emergency": False},
@@ -32,7 +37,7 @@ VEHICLE_TYPES = [
     {"id": "TwoWheelers", "label": "Two-Wheeler", "priority": 0, "color": "#10b981", "emergency": False},
 ]
 
-INTERSECTION_TYPES = {
+INTERSECTION_TYPES: Final[Dict[int, Dict[str, Any]]] = {
     1: {"name": "1-Way Signal", "roads": 1, "description": "Single road with one signal controlling flow"},
     2: {"name": "2-Way Signal", "roads": 2, "description": "Two opposing roads with alternating signals"},
     3: {"name": "3-Way Signal", "roads": 3, "description": "T-intersection with three-phase signal cycle"},
@@ -49,7 +54,7 @@ def _road_labels(count: int) -> List[str]:
 
 def _get_road_emergency_info(
     road: str,
-    vehicles_per_road: Dict[str, List[Dict[str, int]]],
+    vehicles_per_road: Dict[str, List[Dict[str, Any]]],
 ) -> Dict[str, Any]:
     """
     Inspect the actual vehicles on a road to determine its emergency status.
@@ -62,11 +67,11 @@ def _get_road_emergency_info(
     """
     road_vehicles = vehicles_per_road.get(road, [])
     best_priority = 0
-    best_type = None
+    best_type: str | None = None
 
     for v in road_vehicles:
-        vtype = v.get("type", "")
-        vcount = v.get("count", 0)
+        vtype: str = v.get("type", "")
+        vcount: int = v.get("count", 0)
         if vcount > 0 and vtype in EMERGENCY_PRIORITY:
             p = EMERGENCY_PRIORITY[vtype]
             if p > best_priority:
@@ -98,7 +103,7 @@ def _get_road_emergency_info(
 
 def generate_signal_phases(
     intersection_type: int,
-    vehicles_per_road: Dict[str, List[Dict[str, int]]],
+    vehicles_per_road: Dict[str, List[Dict[str, Any]]],
     emergency_roads: List[str] | None = None,
 ) -> Dict[str, Any]:
     """
@@ -117,10 +122,13 @@ def generate_signal_phases(
     info = INTERSECTION_TYPES[intersection_type]
     roads = _road_labels(info["roads"])
 
-    # Compute emergency info for each road from ACTUAL vehicle data
-    road_info = {}
-    actual_emergency_roads = []
+    # Compute emergency info and vehicle totals for each road from ACTUAL
+    # vehicle data — once, reused by the sort key and the phase loop
+    road_info: Dict[str, Dict[str, Any]] = {}
+    road_totals: Dict[str, int] = {}
+    actual_emergency_roads: List[str] = []
     for road in roads:
+        road_totals[road] = sum(v.get("count", 0) for v in vehicles_per_road.get(road, []))
         einfo = _get_road_emergency_info(road, vehicles_per_road)
         road_info[road] = einfo
         if einfo["is_emergency"]:
@@ -130,19 +138,16 @@ def generate_signal_phases(
     total_cycle_time = 0
 
     # Sort roads: highest emergency priority first, then by vehicle count
-    def road_sort_key(r):
-        ei = road_info[r]
-        total_veh = sum(v.get("count", 0) for v in vehicles_per_road.get(r, []))
+    def road_sort_key(r: str) -> Tuple[int, int]:
         # Primary: emergency priority descending (negate for ascending sort)
         # Secondary: vehicle count descending
-        return (-ei["priority"], -total_veh)
+        return (-road_info[r]["priority"], -road_totals[r])
 
     sorted_roads = sorted(roads, key=road_sort_key)
 
     for i, road in enumerate(sorted_roads):
         ei = road_info[road]
-        road_vehicles = vehicles_per_road.get(road, [])
-        total_vehicles = sum(v.get("count", 0) for v in road_vehicles)
+        total_vehicles = road_totals[road]
 
         # Calculate green time based on emergency type and vehicle density
         if ei["is_emergency"]:
@@ -157,11 +162,11 @@ def generate_signal_phases(
         yellow_time = DEFAULT_YELLOW
 
         # Build signal states for all roads during this phase
-        signals = {}
+        signals: Dict[str, str] = {}
         for r in roads:
             signals[r] = "GREEN" if r == road else "RED"
 
-        phase = {
+        phase: Dict[str, Any] = {
             "phase_number": i + 1,
             "active_road": road,
             "green_duration": green_time,
@@ -1,17 +1,52 @@
-"""Dijkstra's shortest-path algorithm for emergency vehicle routing."""
+"""Shortest-path algorithms (Dijkstra, bidirectional Dijkstra, A*) for emergency vehicle routing."""
 
 from __future__ import annotations
 
 import heapq
-from typing import Any, Dict, List, Tuple
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as _csgraph_dijkstra
+except ImportError:  # SciPy is optional — fall back to the pure-Python search
+    csr_matrix = None
+    _csgraph_dijkstra = None
+
+try:
+    from dijkstra_nb import dijkstra_csr as _dijkstra_csr_nb
+except ImportError:  # Numba is optional — fall back to the pure-Python search
+    _dijkstra_csr_nb = None
+
+
+class Graph(NamedTuple):
+    """
+    Road network built by :func:`build_adjacency`, in CSR form.
+
+    Node names are mapped to integer IDs once (``name2id``; ``names`` is the
+    reverse lookup). The neighbours of node ``u`` are
+    ``neighbors[indptr[u]:indptr[u + 1]]`` with matching ``weights``.
+    ``matrix`` is the same graph as a SciPy ``csr_matrix``, or ``None`` when
+    SciPy is unavailable or the graph has negative weights, which SciPy's
+    Dijkstra cannot handle.
+    """
+
+    name2id: Dict[str, int]
+    names: List[str]
+    indptr: np.ndarray     # int32, len = num_nodes + 1
+    neighbors: np.ndarray  # int32, len = num_directed_edges
+    weights: np.ndarray    # int64, len = num_directed_edges
+    matrix: Optional[Any]
 
 
 def build_adjacency(
     edges: List[Dict[str, Any]],
     use_traffic: bool = True,
-) -> Dict[str, List[Tuple[str, int]]]:
+) -> Graph:
     """
-    Build an adjacency list from a list of edge definitions.
+    Build the road graph from a list of edge definitions.
 
     Each edge dict should have keys:
       - from / from_node : source node
@@ -20,69 +55,248 @@ def build_adjacency(
       - traffic_weight   : additional cost due to traffic congestion
 
     If *use_traffic* is True the effective weight is ``distance + traffic_weight``,
-    otherwise only ``distance`` is used.
+    otherwise only ``distance`` is used. Edges are undirected. Node IDs are
+    converted to strings, so ``1`` and ``"1"`` name the same node.
 
-    Returns a dict mapping each node to a list of ``(neighbour, weight)`` tuples.
+    Returns a :class:`Graph` with integer node IDs and CSR adjacency arrays.
     """
-    adj: Dict[str, List[Tuple[str, int]]] = {}
+    name2id: Dict[str, int] = {}
+    heads: List[int] = []
+    tails: List[int] = []
+    edge_weights: List[int] = []
 
     for edge in edges:
-        src = edge.get("from") or edge.get("from_node", "")
-        dst = edge.get("to") or edge.get("to_node", "")
+        src = edge.get("from")
+        dst = edge.get("to")
+        # "is None" rather than "or", so a node ID of 0 isn't dropped
+        src = str(edge.get("from_node", "") if src is None else src)
+        dst = str(edge.get("to_node", "") if dst is None else dst)
         dist = int(edge.get("distance", 1))
         traffic = int(edge.get("traffic_weight", 0)) if use_traffic else 0
-        weight = dist + traffic
 
-        adj.setdefault(src, []).append((dst, weight))
-        adj.setdefault(dst, []).append((src, weight))  # undirected
+        heads.append(name2id.setdefault(src, len(name2id)))
+        tails.append(name2id.setdefault(dst, len(name2id)))
+        edge_weights.append(dist + traffic)
+
+    indptr, neighbors, weights = _build_csr(heads, tails, edge_weights, len(name2id))
+
+    matrix = None
+    if csr_matrix is not None and not (len(weights) and weights.min() < 0):
+        n = len(name2id)
+        matrix = csr_matrix((weights.astype(np.float64), neighbors, indptr), shape=(n, n))
+
+    return Graph(name2id, list(name2id), indptr, neighbors, weights, matrix)
+
+
+def _build_csr(
+    heads: List[int],
+    tails: List[int],
+    edge_weights: List[int],
+    num_nodes: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build symmetric CSR arrays ``(indptr, neighbors, weights)`` from an edge list.
+
+    Parallel edges are collapsed to the cheapest one — a CSR matrix would
+    otherwise sum duplicate entries.
+    """
+    src = np.asarray(heads + tails, dtype=np.int32)
+    dst = np.asarray(tails + heads, dtype=np.int32)
+    wts = np.asarray(edge_weights + edge_weights, dtype=np.int64)
+
+    # Sort by (src, dst, weight) and keep the first entry of each (src, dst) run
+    order = np.lexsort((wts, dst, src))
+    src, dst, wts = src[order], dst[order], wts[order]
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst, wts = src[keep], dst[keep], wts[keep]
+
+    indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, dst, wts
 
-    return adj
+
+def _reconstruct(graph: Graph, prev: List[int], node: int) -> List[str]:
+    """Follow *prev* links (``-1`` terminates) back from *node*; returns names in walk order."""
+    path: List[str] = []
+    while node >= 0:
+        path.append(graph.names[node])
+        node = prev[node]
+    return path
 
 
 def dijkstra(
-    adjacency: Dict[str, List[Tuple[str, int]]],
+    graph: Graph,
     start: str,
     destination: str,
 ) -> Tuple[List[str], int]:
     """
     Classic Dijkstra's algorithm.
 
+    Uses SciPy's compiled ``csgraph.dijkstra`` on the CSR matrix. Without
+    SciPy it uses the Numba-compiled kernel in :mod:`dijkstra_nb` if Numba is
+    installed, and otherwise the pure-Python :func:`bidirectional_dijkstra`.
+    Graphs with negative weights always take the pure-Python path, since
+    neither compiled search supports them.
+
     Returns ``(path, cost)`` where *path* is a list of node names from *start*
     to *destination* (inclusive) and *cost* is the total weight.
 
     If the destination is unreachable, returns ``([], -1)``.
     """
-    if start not in adjacency:
+    s = graph.name2id.get(start)
+    t = graph.name2id.get(destination)
+    if s is None or t is None:
         return ([], -1)
 
-    dist: Dict[str, int] = {start: 0}
-    prev: Dict[str, str | None] = {start: None}
-    visited: set[str] = set()
-    heap: List[Tuple[int, str]] = [(0, start)]
+    if graph.matrix is None:
+        nonnegative = not (len(graph.weights) and graph.weights.min() < 0)
+        if _dijkstra_csr_nb is not None and nonnegative:
+            ids, cost = _dijkstra_csr_nb(graph.indptr, graph.neighbors, graph.weights, s, t)
+            return ([graph.names[i] for i in ids.tolist()], cost)
+        return bidirectional_dijkstra(graph, start, destination)
+
+    dist, predecessors = _csgraph_dijkstra(
+        graph.matrix, directed=True, indices=s, return_predecessors=True
+    )
+    if np.isinf(dist[t]):
+        return ([], -1)
+
+    # SciPy marks the source's predecessor with -9999
+    path = _reconstruct(graph, predecessors, t)
+    return (list(reversed(path)), int(dist[t]))
+
+
+def bidirectional_dijkstra(
+    graph: Graph,
+    start: str,
+    destination: str,
+) -> Tuple[List[str], int]:
+    """
+    Point-to-point Dijkstra searching from both ends at once.
+
+    The forward search grows from *start* and the backward search from
+    *destination* (the graph is undirected, so both use the same adjacency).
+    The cheaper frontier is expanded each step, and the search stops as soon
+    as ``top_forward + top_backward >= best_cost`` — each side typically
+    settles far fewer nodes than a single full scan would.
+
+    Same return contract as :func:`dijkstra`.
+    """
+    s = graph.name2id.get(start)
+    t = graph.name2id.get(destination)
+    if s is None or t is None:
+        return ([], -1)
+    if s == t:
+        return ([start], 0)
+
+    indptr, neighbors, weights = graph.indptr, graph.neighbors, graph.weights
+    n = len(graph.names)
+
+    # Index 0 = forward (from start), 1 = backward (from destination)
+    dist: Tuple[List[float], List[float]] = ([math.inf] * n, [math.inf] * n)
+    prev: Tuple[List[int], List[int]] = ([-1] * n, [-1] * n)
+    settled: Tuple[List[bool], List[bool]] = ([False] * n, [False] * n)
+    heaps: Tuple[List[Tuple[int, int]], List[Tuple[int, int]]] = ([(0, s)], [(0, t)])
+    dist[0][s] = 0
+    dist[1][t] = 0
+    best_cost = math.inf
+    meeting = -1
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best_cost:
+            break
+
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        cost, u = heapq.heappop(heaps[side])
+        if settled[side][u]:
+            continue
+        settled[side][u] = True
+
+        this_dist, other_dist = dist[side], dist[1 - side]
+        this_prev, this_settled = prev[side], settled[side]
+        lo, hi = indptr[u], indptr[u + 1]
+        for v, w in zip(neighbors[lo:hi].tolist(), weights[lo:hi].tolist()):
+            if this_settled[v]:
+                continue
+            new_cost = cost + w
+            if new_cost < this_dist[v]:
+                this_dist[v] = new_cost
+                this_prev[v] = u
+                heapq.heappush(heaps[side], (new_cost, v))
+
+                # Path start → v → destination through the other search
+                if new_cost + other_dist[v] < best_cost:
+                    best_cost = new_cost + other_dist[v]
+                    meeting = v
+
+    if meeting < 0:
+        return ([], -1)
+
+    # Stitch: start … meeting (forward prev, reversed) + … destination (backward prev)
+    path = list(reversed(_reconstruct(graph, prev[0], meeting)))
+    path.extend(_reconstruct(graph, prev[1], prev[1][meeting]))
+    return (path, int(best_cost))
+
+
+def astar(
+    graph: Graph,
+    start: str,
+    destination: str,
+    node_coords: Dict[str, Tuple[float, float]],
+) -> Tuple[List[str], int]:
+    """
+    A* search guided by straight-line distance to *destination*.
+
+    ``h(u)`` is the Euclidean distance between ``node_coords[u]`` and the
+    destination's coordinates. The result is optimal when every edge weight
+    is at least the straight-line distance between its endpoints, i.e.
+    coordinates share the units of ``distance``. A node without coordinates
+    would break that guarantee, so unless every node has them this falls
+    back to :func:`dijkstra`.
+
+    Same return contract as :func:`dijkstra`.
+    """
+    s = graph.name2id.get(start)
+    t = graph.name2id.get(destination)
+    if s is None or t is None:
+        return ([], -1)
+    if not all(name in node_coords for name in graph.names):
+        return dijkstra(graph, start, destination)
+
+    # Precompute h(u) per node ID
+    n = len(graph.names)
+    tx, ty = node_coords[destination]
+    h: List[float] = [0.0] * n
+    for u, name in enumerate(graph.names):
+        x, y = node_coords[name]
+        h[u] = math.hypot(x - tx, y - ty)
+
+    indptr, neighbors, weights = graph.indptr, graph.neighbors, graph.weights
+    dist: List[float] = [math.inf] * n
+    prev: List[int] = [-1] * n
+    visited: List[bool] = [False] * n
+    dist[s] = 0
+    heap: List[Tuple[float, int, int]] = [(h[s], 0, s)]
 
     while heap:
-        cost, node = heapq.heappop(heap)
+        _, cost, u = heapq.heappop(heap)
 
-        if node in visited:
+        if visited[u]:
             continue
-        visited.add(node)
-
-        if node == destination:
-            # Reconstruct path
-            path: List[str] = []
-            cur: str | None = destination
-            while cur is not None:
-                path.append(cur)
-                cur = prev.get(cur)
-            return (list(reversed(path)), cost)
-
-        for neighbour, weight in adjacency.get(node, []):
-            if neighbour in visited:
+        visited[u] = True
+
+        if u == t:
+            return (list(reversed(_reconstruct(graph, prev, t))), cost)
+
+        lo, hi = indptr[u], indptr[u + 1]
+        for v, w in zip(neighbors[lo:hi].tolist(), weights[lo:hi].tolist()):
+            if visited[v]:
                 continue
-            new_cost = cost + weight
-            if new_cost < dist.get(neighbour, float("inf")):
-                dist[neighbour] = new_cost
-                prev[neighbour] = node
-                heapq.heappush(heap, (new_cost, neighbour))
+            new_cost = cost + w
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                prev[v] = u
+                heapq.heappush(heap, (new_cost + h[v], new_cost, v))
 
     return ([], -1)
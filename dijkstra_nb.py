@@ -0,0 +1,119 @@
+"""Numba-compiled Dijkstra kernel over CSR arrays.
+
+Optional accelerator for :mod:`dijkstra`: importing this module fails with
+``ImportError`` when Numba is not installed, and ``dijkstra`` then keeps its
+pure-Python fallback.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _sift_up(heap_key, heap_val, i):
+    while i > 0:
+        parent = (i - 1) >> 1
+        if heap_key[parent] <= heap_key[i]:
+            break
+        heap_key[parent], heap_key[i] = heap_key[i], heap_key[parent]
+        heap_val[parent], heap_val[i] = heap_val[i], heap_val[parent]
+        i = parent
+
+
+@njit(cache=True)
+def _sift_down(heap_key, heap_val, i, size):
+    while True:
+        smallest = i
+        left = 2 * i + 1
+        right = left + 1
+        if left < size and heap_key[left] < heap_key[smallest]:
+            smallest = left
+        if right < size and heap_key[right] < heap_key[smallest]:
+            smallest = right
+        if smallest == i:
+            break
+        heap_key[smallest], heap_key[i] = heap_key[i], heap_key[smallest]
+        heap_val[smallest], heap_val[i] = heap_val[i], heap_val[smallest]
+        i = smallest
+
+
+@njit(cache=True)
+def _dijkstra_csr(indptr, neighbors, weights, s, t):
+    n = indptr.shape[0] - 1
+    dist = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+    prev = np.full(n, -1, dtype=np.int64)
+    visited = np.zeros(n, dtype=np.bool_)
+
+    # Array-backed binary min-heap with lazy deletion. Every push follows a
+    # successful relaxation, and each directed edge relaxes at most once.
+    capacity = neighbors.shape[0] + 1
+    heap_key = np.empty(capacity, dtype=np.int64)
+    heap_val = np.empty(capacity, dtype=np.int64)
+    heap_key[0] = 0
+    heap_val[0] = s
+    size = 1
+    dist[s] = 0
+
+    while size > 0:
+        cost = heap_key[0]
+        u = heap_val[0]
+        size -= 1
+        if size > 0:
+            heap_key[0] = heap_key[size]
+            heap_val[0] = heap_val[size]
+            _sift_down(heap_key, heap_val, 0, size)
+
+        if visited[u]:
+            continue
+        visited[u] = True
+        if u == t:
+            break
+
+        for k in range(indptr[u], indptr[u + 1]):
+            v = neighbors[k]
+            if visited[v]:
+                continue
+            new_cost = cost + weights[k]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                prev[v] = u
+                heap_key[size] = new_cost
+                heap_val[size] = v
+                _sift_up(heap_key, heap_val, size)
+                size += 1
+
+    if not visited[t]:
+        return np.empty(0, dtype=np.int64), -1
+
+    count = 0
+    cur = t
+    while cur >= 0:
+        count += 1
+        cur = prev[cur]
+    path = np.empty(count, dtype=np.int64)
+    cur = t
+    for i in range(count - 1, -1, -1):
+        path[i] = cur
+        cur = prev[cur]
+    return path, dist[t]
+
+
+def dijkstra_csr(
+    indptr: np.ndarray,
+    neighbors: np.ndarray,
+    weights: np.ndarray,
+    s: int,
+    t: int,
+) -> Tuple[np.ndarray, int]:
+    """
+    Point-to-point Dijkstra from node ID *s* to *t* on CSR arrays.
+
+    Returns ``(path, cost)`` where *path* is an array of node IDs from *s* to
+    *t* (inclusive), or ``(empty array, -1)`` if *t* is unreachable.
+    """
+    path, cost = _dijkstra_csr(indptr, neighbors, weights, s, t)
+    return path, int(cost)
@@ -4,6 +4,7 @@ import { Camera, Upload, AlertTriangle, RefreshCw, FolderOpen } from 'lucide-rea
 const API_WS_URL = 'ws://localhost:8000/api/ws/detect';
 const RECONNECT_DELAY_MS = 3000;
 const FRAME_INTERVAL_MS = 500;
+const textDecoder = new TextDecoder();
 
 export default function VideoFeed({ onDetections, active = true }) {
   const videoRef = useRef(null);
@@ -46,6 +47,7 @@ export default function VideoFeed({ onDetections, active = true }) {
     if (wsRef.current && wsRef.current.readyState <= 1) return;
     setStatus('connecting');
     const ws = new WebSocket(API_WS_URL);
+    ws.binaryType = 'arraybuffer';
     wsRef.current = ws;
     waitingRef.current = false;
 
@@ -61,7 +63,9 @@ export default function VideoFeed({ onDetections, active = true }) {
     ws.onmessage = (event) => {
       waitingRef.current = false;
       try {
-        const data = JSON.parse(event.data);
+        // Replies mirror the frame type sent: binary for JPEG blobs
+        const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+        const data = JSON.parse(text);
         if (data.type === 'ping') return;
         if (data.error) { console.warn('[VideoFeed] Server error:', data.error); return; }
         drawDetections(data.detections || []);
@@ -113,11 +117,8 @@ export default function VideoFeed({ onDetections, active = true }) {
     offscreen.toBlob(
       (blob) => {
         if (!blob || !wsRef.current || wsRef.current.readyState !== 1) return;
-        const reader = new FileReader();
-        reader.onloadend = () => {
-          try { waitingRef.current = true; wsRef.current.send(JSON.stringify({ frame: reader.result })); } catch { }
-        };
-        reader.readAsDataURL(blob);
+        // Send raw JPEG bytes as a binary frame — no base64/JSON wrapping
+        try { waitingRef.current = true; wsRef.current.send(blob); } catch { }
       },
       'image/jpeg', 0.6,
     );
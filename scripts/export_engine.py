@@ -0,0 +1,38 @@
+"""Export the YOLO weights to a TensorRT FP16 engine.
+
+Writes ``model/best.engine`` next to ``model/best.pt``; the backend loads the
+engine instead of the PyTorch weights whenever it exists and a CUDA device is
+available. Engines are tied to the GPU and TensorRT version they were built
+with, so run this on the deployment machine:
+
+    python scripts/export_engine.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from ultralytics import YOLO
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_WEIGHTS = _PROJECT_ROOT / "model" / "best.pt"
+
+
+def main():
+    model = YOLO(str(_WEIGHTS))
+    # Export at the size the model was trained at — the backend runs at it too
+    imgsz = model.overrides["imgsz"]
+    # Dynamic batch up to the BatchScheduler's max_batch (8)
+    engine_path = model.export(
+        format="engine",
+        half=True,
+        imgsz=imgsz,
+        batch=8,
+        dynamic=True,
+        device=0,
+    )
+    print(f"[Export] TensorRT engine written to: {engine_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Export the YOLO weights to an int8 OpenVINO model for CPU-only hosts.
+
+Writes ``model/best_int8_openvino_model/`` next to ``model/best.pt``; on hosts
+without CUDA the backend loads it in preference to the FP32 PyTorch weights.
+Int8 calibration reads the validation images referenced by ``data.yaml``, so
+download the Roboflow dataset first (or pass ``--data`` pointing elsewhere):
+
+    python scripts/export_quantized.py
+    python scripts/export_quantized.py --onnx   # FP32 ONNX instead
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from ultralytics import YOLO
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_WEIGHTS = _PROJECT_ROOT / "model" / "best.pt"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=str(_PROJECT_ROOT / "data.yaml"),
+                        help="dataset YAML used for int8 calibration")
+    parser.add_argument("--onnx", action="store_true",
+                        help="export FP32 ONNX (model/best.onnx) instead of int8 OpenVINO")
+    args = parser.parse_args()
+
+    model = YOLO(str(_WEIGHTS))
+    # Export at the size the model was trained at — the backend runs at it too
+    imgsz = model.overrides["imgsz"]
+    # Dynamic shapes: the BatchScheduler sends up to 8 frames per forward pass
+    if args.onnx:
+        out = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    else:
+        out = model.export(format="openvino", int8=True, data=args.data, imgsz=imgsz, dynamic=True)
+    print(f"[Export] Model written to: {out}")
+
+
+if __name__ == "__main__":
+    main()